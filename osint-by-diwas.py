@@ -5,29 +5,45 @@ A comprehensive OSINT bot with 30+ features for intelligence gathering
 Compatible with telebotcreator.com and nxcreate.com
 """
 
+import io
 import os
 import time
 import json
+import math
+import mmap
+import heapq
+import struct
+import argparse
+import tempfile
+import threading
 import requests
 import asyncio
 import hashlib
 import subprocess
+import socket
+import fcntl
+import contextlib
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple, AsyncIterator
 import logging
 
 # Telegram bot imports
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler, ContextTypes
 from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
 
 # Additional imports for OSINT features
 import whois
 import dns.resolver
+import dns.reversename
 from PIL import Image
 from PIL.ExifTags import TAGS
 import re
 import urllib.parse
+import ipaddress
 
 # Configure logging
 logging.basicConfig(
@@ -41,10 +57,1453 @@ BOT_TOKEN = "8399190156:AAHS-R8lCYRHyZRkWnb2rB6ipRfbFvfoxVw"
 CHANNEL_USERNAME = "@team_falcone"
 CHANNEL_ID = -1001234567890  # Replace with actual channel ID
 
+# Local data stores (built offline with the import commands, see main())
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+HASH_INDEX_DIR = os.path.join(DATA_DIR, "hashes")
+
+# Known-hash index layout: header, then sorted fixed-width (digest, label id) records
+HASH_ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256"}  # hex length -> algorithm
+HASH_INDEX_MAGIC = b"OSHX"
+HASH_INDEX_HEADER = struct.Struct("<4sHHQ")  # magic, version, digest size, record count
+HASH_LABEL = struct.Struct("<I")
+BLOOM_MAGIC = b"OSBF"
+BLOOM_HEADER = struct.Struct("<4sQI")  # magic, bit count, hash function count
+
+# Breach index layout: partitioned sorted (SHA-1 of email, breach id) records
+BREACH_INDEX_DIR = os.path.join(DATA_DIR, "breaches")
+BREACH_RECORD = struct.Struct("<20sI")
+
+# Full-text search over ingested paste and code dumps
+SEARCH_INDEX_DIR = os.path.join(DATA_DIR, "search")
+SEARCH_DOC = struct.Struct("<QII")  # document offset, length, token count
+SEARCH_POSTING = struct.Struct("<II")  # doc id, term frequency (positions follow)
+SEARCH_FLUSH_DOCS = 10_000  # documents buffered in memory per new segment
+SEARCH_MERGE_FACTOR = 8  # merge the smallest segments once there are more than this
+SEARCH_MAX_DOCUMENT = 2 * 1024 * 1024
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# URL expander
+URL_MAX_HOPS = 10
+URL_MAX_PER_MESSAGE = 20
+URL_CACHE_SIZE = 10_000
+URL_CACHE_TTL = 24 * 3600  # seconds
+URL_TIMEOUT = 10  # seconds per hop
+URL_MAX_WORKERS = 8  # dedicated pool, so slow chains can't starve the default executor
+URL_USER_AGENT = "Mozilla/5.0 (compatible; OSINT-by-Diwas/1.0)"
+
+# Target pivot pipeline
+COMMON_SUBDOMAINS = ['www', 'mail', 'ftp', 'admin', 'blog', 'shop', 'api', 'dev', 'test', 'staging']
+PIVOT_MAX_NODES = 60
+PIVOT_MAX_DEPTH = 3
+PIVOT_DNS_TIMEOUT = 5  # seconds
+# Common multi-label public suffixes: names under these register one label deeper
+PUBLIC_SUFFIXES = {
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'net.uk', 'ltd.uk', 'plc.uk', 'me.uk', 'sch.uk',
+    'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au', 'asn.au', 'id.au',
+    'co.jp', 'ne.jp', 'or.jp', 'ac.jp', 'go.jp', 'ad.jp', 'ed.jp', 'gr.jp', 'lg.jp',
+    'co.nz', 'net.nz', 'org.nz', 'ac.nz', 'govt.nz', 'co.za', 'org.za', 'ac.za', 'gov.za',
+    'com.br', 'net.br', 'org.br', 'gov.br', 'com.cn', 'net.cn', 'org.cn', 'gov.cn', 'edu.cn',
+    'co.in', 'net.in', 'org.in', 'gov.in', 'ac.in', 'co.kr', 'or.kr', 'ac.kr', 'go.kr',
+    'co.id', 'or.id', 'ac.id', 'go.id', 'co.il', 'org.il', 'ac.il', 'co.th', 'in.th', 'ac.th',
+    'com.np', 'org.np', 'edu.np', 'gov.np', 'com.mx', 'com.ar', 'com.tr', 'gov.tr', 'com.tw',
+    'com.hk', 'com.sg', 'com.my', 'com.pk', 'com.ua', 'com.ng', 'com.vn', 'com.ph', 'com.eg',
+    'com.sa', 'com.co', 'com.pe', 'com.bd', 'com.lk', 'co.ke', 'co.tz', 'co.ug',
+}
+PIVOT_PROGRESS_INTERVAL = 3  # seconds between edits of the progress message
+PIVOT_MAX_WORKERS = 16  # shared by all pivots; lookups are I/O bound, so not sized by CPU count
+
+# Message rendering
+MESSAGE_LIMIT = 4096  # Telegram limit, in UTF-16 code units after escaping
+REPORT_WRAP = 1000  # raw characters per line; escaping at most doubles this
+REPORT_MAX_MESSAGES = 3  # longer reports are sent as a single text file instead
+
+
+class BloomFilter:
+    """Memory-mapped Bloom filter over raw hash digests"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes = BLOOM_HEADER.unpack_from(self._map, 0)
+        if magic != BLOOM_MAGIC:
+            raise ValueError(f"Not a bloom filter file: {path}")
+
+    @staticmethod
+    def _positions(digest: bytes, bits: int, hashes: int) -> Iterator[int]:
+        # Digests are already uniformly distributed, so double hashing over
+        # two slices of the digest is enough to derive k bit positions
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return ((h1 + i * h2) % bits for i in range(hashes))
+
+    def __contains__(self, digest: bytes) -> bool:
+        offset = BLOOM_HEADER.size
+        for position in self._positions(digest, self.bits, self.hashes):
+            if not self._map[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def build(cls, path: str, digests: Iterable[bytes], count: int, error_rate: float = 0.01):
+        """Write a Bloom filter sized for `count` digests to `path`"""
+        count = max(count, 1)
+        bits = max(8, int(-count * math.log(error_rate) / (math.log(2) ** 2)))
+        hashes = max(1, round(bits / count * math.log(2)))
+        size = BLOOM_HEADER.size + (bits + 7) // 8
+
+        with open(path, "wb+") as f:
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), size) as bitmap:
+                BLOOM_HEADER.pack_into(bitmap, 0, BLOOM_MAGIC, bits, hashes)
+                offset = BLOOM_HEADER.size
+                for digest in digests:
+                    for position in cls._positions(digest, bits, hashes):
+                        bitmap[offset + (position >> 3)] |= 1 << (position & 7)
+
+
+class HashIndex:
+    """Sorted fixed-width hash records for one algorithm, binary searched in place"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _version, self.digest_size, self.count = HASH_INDEX_HEADER.unpack_from(self._map, 0)
+        if magic != HASH_INDEX_MAGIC:
+            raise ValueError(f"Not a hash index file: {path}")
+        self.record_size = self.digest_size + HASH_LABEL.size
+
+        bloom_path = path + ".bloom"
+        self.bloom = BloomFilter(bloom_path) if os.path.exists(bloom_path) else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, digest: bytes) -> Optional[int]:
+        """Return the label id stored for `digest`, or None if it is unknown"""
+        if self.bloom is not None and digest not in self.bloom:
+            return None
+
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HASH_INDEX_HEADER.size + mid * self.record_size
+            key = self._map[offset:offset + self.digest_size]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return HASH_LABEL.unpack_from(self._map, offset + self.digest_size)[0]
+        return None
+
+    def records(self) -> Iterator[bytes]:
+        """Yield every raw record in sorted order"""
+        start = HASH_INDEX_HEADER.size
+        for i in range(self.count):
+            offset = start + i * self.record_size
+            yield self._map[offset:offset + self.record_size]
+
+    def close(self):
+        if self.bloom is not None:
+            self.bloom.close()
+        self._map.close()
+        self._file.close()
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    """Identify one version of a file that is only ever replaced via os.replace()"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # A replacement always gets a new inode, even within one mtime tick
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class KnownHashStore:
+    """Known-file hash corpus (NSRL, malware sets) with one index per algorithm"""
+
+    def __init__(self, directory: str = HASH_INDEX_DIR):
+        self.directory = directory
+        self._indexes: Dict[str, Tuple[Tuple[int, int], HashIndex]] = {}
+        self._labels: List[str] = []
+        self._labels_version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def detect_algorithm(file_hash: str) -> Optional[str]:
+        """Guess the hash algorithm from a hex digest, None if it isn't one"""
+        if not re.fullmatch(r'[0-9a-fA-F]+', file_hash):
+            return None
+        return HASH_ALGORITHMS.get(len(file_hash))
+
+    def _index(self, algorithm: str) -> Optional[HashIndex]:
+        # Imports replace index files atomically, so reopen whenever one changes
+        path = os.path.join(self.directory, f"{algorithm}.idx")
+        version = _file_version(path)
+        if version is None:
+            return None
+
+        with self._lock:
+            cached = self._indexes.get(algorithm)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            # Lookups run on executor threads, so a replaced index is left for
+            # the GC to unmap rather than closed under another reader
+            index = HashIndex(path)
+            self._indexes[algorithm] = (version, index)
+            return index
+
+    def _label(self, label_id: int) -> str:
+        version = _file_version(os.path.join(self.directory, "labels.json"))
+        if version != self._labels_version:
+            self._labels = load_hash_labels(self.directory)
+            self._labels_version = version
+        return self._labels[label_id] if label_id < len(self._labels) else "unknown"
+
+    def lookup(self, file_hash: str) -> Optional[str]:
+        """Return the source label for a known hash, or None if not in the corpus"""
+        algorithm = self.detect_algorithm(file_hash)
+        if algorithm is None:
+            raise ValueError(f"Unsupported hash: {file_hash}")
+
+        index = self._index(algorithm)
+        if index is None:
+            return None
+
+        label_id = index.lookup(bytes.fromhex(file_hash))
+        return None if label_id is None else self._label(label_id)
+
+
+def load_hash_labels(directory: str) -> List[str]:
+    """Load the label table shared by all hash indexes"""
+    path = os.path.join(directory, "labels.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_records(path: str, record_size: int) -> Iterator[bytes]:
+    """Stream fixed-width records back from a sorted run file"""
+    with open(path, "rb") as f:
+        while True:
+            record = f.read(record_size)
+            if len(record) < record_size:
+                return
+            yield record
+
+
+def _read_lines(path: str) -> Iterator[bytes]:
+    """Stream newline-terminated records back from a sorted run file"""
+    with open(path, "rb") as f:
+        yield from f
+
+
+def _write_run(records: List[bytes], directory: str) -> str:
+    """Sort one in-memory chunk and spill it to a temporary run file"""
+    records.sort()
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.writelines(records)
+    return path
+
+
+def _bisect_lines(mapped: mmap.mmap, key: bytes) -> int:
+    """Return the offset of the first line >= key in a sorted, newline-terminated file"""
+    lo, hi = 0, len(mapped)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = mapped.rfind(b"\n", 0, mid) + 1
+        end = mapped.find(b"\n", start)
+        if mapped[start:end] < key:
+            lo = end + 1
+        else:
+            hi = start
+    return lo
+
+
+@contextlib.contextmanager
+def _directory_lock(directory: str) -> Iterator[None]:
+    """Hold an exclusive cross-process lock on an index directory"""
+    with open(os.path.join(directory, "import.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def import_hash_dumps(dumps: List[str], directory: str = HASH_INDEX_DIR,
+                      label: Optional[str] = None, chunk_size: int = 1_000_000) -> Dict[str, int]:
+    """Merge text hash dumps into the on-disk indexes and return the new record counts
+
+    Every MD5, SHA-1 or SHA-256 hex token on a line is indexed, which covers plain
+    hash lists, hashdeep output and NSRL CSV rows. Input is sorted externally in
+    runs of `chunk_size` records, so dumps larger than memory are fine. Hashes
+    already present keep their original label; within a batch the earliest
+    registered label wins.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Imports read-modify-write labels.json and the indexes, so serialize them
+    with _directory_lock(directory):
+        labels = load_hash_labels(directory)
+        token_pattern = re.compile(r'\b(?:[0-9a-fA-F]{64}|[0-9a-fA-F]{40}|[0-9a-fA-F]{32})\b')
+
+        buffers: Dict[str, List[bytes]] = {name: [] for name in HASH_ALGORITHMS.values()}
+        runs: Dict[str, List[str]] = {name: [] for name in HASH_ALGORITHMS.values()}
+        counts: Dict[str, int] = {}
+
+        try:
+            for dump in dumps:
+                dump_label = label or os.path.basename(dump)
+                if dump_label not in labels:
+                    labels.append(dump_label)
+                label_bytes = HASH_LABEL.pack(labels.index(dump_label))
+
+                with open(dump, "r", encoding="utf-8", errors="ignore") as f:
+                    for line in f:
+                        for token in token_pattern.findall(line):
+                            algorithm = HASH_ALGORITHMS[len(token)]
+                            buffer = buffers[algorithm]
+                            buffer.append(bytes.fromhex(token) + label_bytes)
+                            if len(buffer) >= chunk_size:
+                                runs[algorithm].append(_write_run(buffer, directory))
+                                buffer.clear()
+
+            # Labels are append-only, so publish them before any index can refer to them
+            labels_tmp = os.path.join(directory, "labels.json.tmp")
+            with open(labels_tmp, "w", encoding="utf-8") as f:
+                json.dump(labels, f)
+            os.replace(labels_tmp, os.path.join(directory, "labels.json"))
+
+            for hex_length, algorithm in HASH_ALGORITHMS.items():
+                digest_size = hex_length // 2
+                if buffers[algorithm]:
+                    runs[algorithm].append(_write_run(buffers[algorithm], directory))
+                    buffers[algorithm] = []
+                if not runs[algorithm]:
+                    continue
+
+                path = os.path.join(directory, f"{algorithm}.idx")
+                existing = HashIndex(path) if os.path.exists(path) else None
+                sources = [existing.records()] if existing else []
+                sources += [_read_records(run, digest_size + HASH_LABEL.size) for run in runs[algorithm]]
+
+                # Existing records come first so duplicates keep their original label
+                fd, tmp_path = tempfile.mkstemp(suffix=".idx", dir=directory)
+                count = 0
+                previous = None
+                with os.fdopen(fd, "wb") as out:
+                    out.write(HASH_INDEX_HEADER.pack(HASH_INDEX_MAGIC, 1, digest_size, 0))
+                    for record in heapq.merge(*sources, key=lambda r: r[:digest_size]):
+                        digest = record[:digest_size]
+                        if digest == previous:
+                            continue
+                        out.write(record)
+                        previous = digest
+                        count += 1
+                    out.seek(0)
+                    out.write(HASH_INDEX_HEADER.pack(HASH_INDEX_MAGIC, 1, digest_size, count))
+                if existing:
+                    existing.close()
+
+                # Swap the bloom filter in first: a newer filter over an older index
+                # only costs a wasted search, never a missed hash
+                merged = HashIndex(tmp_path)
+                bloom_tmp = tmp_path + ".bloom.tmp"
+                BloomFilter.build(bloom_tmp, (r[:digest_size] for r in merged.records()), count)
+                merged.close()
+                os.replace(bloom_tmp, path + ".bloom")
+                os.replace(tmp_path, path)
+                counts[algorithm] = count
+        finally:
+            for paths in runs.values():
+                for run in paths:
+                    if os.path.exists(run):
+                        os.remove(run)
+
+    return counts
+
+
+class BreachStore:
+    """Offline breach corpus keyed by hashed email, with a per-domain secondary index
+
+    Email records are SHA-1(email) + breach id, sorted and partitioned into 256
+    files by the first hash byte, so one email is a single contiguous range in
+    one mmapped partition. The domain index is a sorted text file of
+    `domain<TAB>local part<TAB>breach id` lines that is streamed, never loaded.
+    """
+
+    def __init__(self, directory: str = BREACH_INDEX_DIR):
+        self.directory = directory
+        self._partitions: Dict[str, Tuple[Tuple[int, int], mmap.mmap]] = {}
+        self._catalog: List[Dict[str, Any]] = []
+        self._catalog_version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def email_key(email: str) -> bytes:
+        return hashlib.sha1(email.strip().lower().encode("utf-8")).digest()
+
+    def _partition(self, path: str) -> Optional[mmap.mmap]:
+        # Imports replace files atomically, so remap whenever one changes
+        version = _file_version(path)
+        if version is None or os.path.getsize(path) == 0:
+            return None
+
+        with self._lock:
+            cached = self._partitions.get(path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            # Lookups run on executor threads, so a replaced mapping is left
+            # for the GC to unmap rather than closed under another reader
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._partitions[path] = (version, mapped)
+            return mapped
+
+    def breach(self, breach_id: int) -> Dict[str, Any]:
+        """Return catalog metadata for a breach id"""
+        version = _file_version(os.path.join(self.directory, "breaches.json"))
+        if version != self._catalog_version:
+            self._catalog = load_breach_catalog(self.directory)
+            self._catalog_version = version
+        if breach_id < len(self._catalog):
+            return self._catalog[breach_id]
+        return {"name": "unknown", "date": None, "data_classes": []}
+
+    def check_email(self, email: str) -> List[Dict[str, Any]]:
+        """Return metadata for every breach containing `email`"""
+        key = self.email_key(email)
+        path = os.path.join(self.directory, "emails", f"{key[0]:02x}.idx")
+        mapped = self._partition(path)
+        if mapped is None:
+            return []
+
+        size = BREACH_RECORD.size
+        lo, hi = 0, len(mapped) // size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mapped[mid * size:mid * size + len(key)] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        breaches = []
+        for offset in range(lo * size, len(mapped), size):
+            record_key, breach_id = BREACH_RECORD.unpack_from(mapped, offset)
+            if record_key != key:
+                break
+            breaches.append(self.breach(breach_id))
+        return breaches
+
+    def domain_entries(self, domain: str) -> Iterator[Tuple[str, int]]:
+        """Stream (email, breach id) pairs for a domain, sorted by local part"""
+        domain = domain.strip().lower()
+        path = os.path.join(self.directory, "domains.idx")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        prefix = domain.encode("utf-8") + b"\t"
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            f.seek(_bisect_lines(mapped, prefix))
+            for line in f:
+                if not line.startswith(prefix):
+                    break
+                _domain, local_part, breach_id = line.rstrip(b"\n").split(b"\t")
+                yield f"{local_part.decode('utf-8')}@{domain}", int(breach_id)
+
+    def domain_summary(self, domain: str, show: int = 20) -> Tuple[int, Dict[int, int], List[str]]:
+        """Return (account count, entries per breach id, first `show` accounts) for a domain"""
+        # Entries stream in sorted by local part, so repeats of an account are adjacent
+        accounts = 0
+        shown: List[str] = []
+        per_breach: Dict[int, int] = {}
+        previous = None
+
+        for email, breach_id in self.domain_entries(domain):
+            per_breach[breach_id] = per_breach.get(breach_id, 0) + 1
+            if email != previous:
+                accounts += 1
+                if len(shown) < show:
+                    shown.append(email)
+                previous = email
+        return accounts, per_breach, shown
+
+
+def load_breach_catalog(directory: str) -> List[Dict[str, Any]]:
+    """Load breach metadata, indexed by breach id"""
+    path = os.path.join(directory, "breaches.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_partitions(records: Iterator[bytes], directory: str) -> int:
+    """Split sorted email records into per-prefix files, replacing them atomically"""
+    os.makedirs(directory, exist_ok=True)
+    pending = []
+    count = 0
+    out = None
+    prefix = None
+    previous = None
+
+    try:
+        for record in records:
+            if record == previous:
+                continue
+            previous = record
+            if record[0] != prefix:
+                if out is not None:
+                    out.close()
+                prefix = record[0]
+                fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+                out = os.fdopen(fd, "wb")
+                pending.append((tmp_path, os.path.join(directory, f"{prefix:02x}.idx")))
+            out.write(record)
+            count += 1
+        if out is not None:
+            out.close()
+        for tmp_path, path in pending:
+            os.replace(tmp_path, path)
+    finally:
+        for tmp_path, _path in pending:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return count
+
+
+def import_breach_dumps(dumps: List[str], name: str, directory: str = BREACH_INDEX_DIR,
+                        date: Optional[str] = None, data_classes: Optional[List[str]] = None,
+                        chunk_size: int = 1_000_000) -> Dict[str, int]:
+    """Merge breach dumps into the email and domain indexes
+
+    The first email address on each line is indexed; anything else on the line
+    (passwords, hashes, names) is discarded. Like the hash import, input is
+    sorted externally and merged with the existing files in one streaming pass.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Concurrent imports would each rewrite the catalog and partitions from the same base
+    with _directory_lock(directory):
+        email_dir = os.path.join(directory, "emails")
+        catalog = load_breach_catalog(directory)
+
+        breach_id = next((i for i, b in enumerate(catalog) if b["name"] == name), None)
+        if breach_id is None:
+            breach_id = len(catalog)
+            catalog.append({"name": name, "date": date, "data_classes": data_classes or []})
+
+        email_pattern = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+        email_buffer: List[bytes] = []
+        domain_buffer: List[bytes] = []
+        email_runs: List[str] = []
+        domain_runs: List[str] = []
+        suffix = f"\t{breach_id}\n".encode("utf-8")
+
+        try:
+            for dump in dumps:
+                with open(dump, "r", encoding="utf-8", errors="ignore") as f:
+                    for line in f:
+                        match = email_pattern.search(line)
+                        if not match:
+                            continue
+                        email = match.group(0).lower()
+                        local_part, domain = email.rsplit("@", 1)
+                        email_buffer.append(BREACH_RECORD.pack(BreachStore.email_key(email), breach_id))
+                        domain_buffer.append(f"{domain}\t{local_part}".encode("utf-8") + suffix)
+                        if len(email_buffer) >= chunk_size:
+                            email_runs.append(_write_run(email_buffer, directory))
+                            domain_runs.append(_write_run(domain_buffer, directory))
+                            email_buffer.clear()
+                            domain_buffer.clear()
+            if email_buffer:
+                email_runs.append(_write_run(email_buffer, directory))
+                domain_runs.append(_write_run(domain_buffer, directory))
+
+            # Publish the catalog first so indexed breach ids always resolve
+            catalog_tmp = os.path.join(directory, "breaches.json.tmp")
+            with open(catalog_tmp, "w", encoding="utf-8") as f:
+                json.dump(catalog, f, indent=2)
+            os.replace(catalog_tmp, os.path.join(directory, "breaches.json"))
+
+            # Existing partitions are sorted individually and ordered by prefix,
+            # so chaining them gives one globally sorted stream
+            existing = sorted(os.listdir(email_dir)) if os.path.isdir(email_dir) else []
+            email_sources = [_read_records(os.path.join(email_dir, p), BREACH_RECORD.size)
+                             for p in existing if p.endswith(".idx")]
+            email_sources += [_read_records(run, BREACH_RECORD.size) for run in email_runs]
+            emails = _write_partitions(heapq.merge(*email_sources), email_dir)
+
+            domain_path = os.path.join(directory, "domains.idx")
+            domain_sources = [_read_lines(run) for run in domain_runs]
+            if os.path.exists(domain_path):
+                domain_sources.append(_read_lines(domain_path))
+            fd, tmp_path = tempfile.mkstemp(suffix=".idx", dir=directory)
+            domains = 0
+            previous = None
+            with os.fdopen(fd, "wb") as out:
+                for line in heapq.merge(*domain_sources):
+                    if line != previous:
+                        out.write(line)
+                        previous = line
+                        domains += 1
+            os.replace(tmp_path, domain_path)
+        finally:
+            for run in email_runs + domain_runs:
+                if os.path.exists(run):
+                    os.remove(run)
+
+    return {"emails": emails, "domain_entries": domains}
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+
+def _intersect_postings(cursors: List[Iterator[Tuple[int, int, int]]]) -> Iterator[List[Tuple[int, int, int]]]:
+    """Leapfrog-join postings cursors sorted by doc id, yielding one entry per cursor per common doc"""
+    heads = [next(cursor, None) for cursor in cursors]
+    if None in heads:
+        return
+    target = heads[0][0]
+    while True:
+        for i, cursor in enumerate(cursors):
+            while heads[i][0] < target:
+                heads[i] = next(cursor, None)
+                if heads[i] is None:
+                    return
+            target = heads[i][0]
+        if all(head[0] == target for head in heads):
+            yield list(heads)
+            heads[0] = next(cursors[0], None)
+            if heads[0] is None:
+                return
+            target = heads[0][0]
+
+
+class SearchSegment:
+    """One immutable segment of a search index, read through mmap
+
+    Files per segment: `.docs` (JSON documents back to back), `.dix` (fixed-width
+    offset/length/token count per doc), `.terms` (sorted `term<TAB>offset<TAB>
+    length<TAB>df` lines) and `.post` (doc id, frequency and positions per term).
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        base = os.path.join(directory, name)
+        self._docs = self._map(base + ".docs")
+        self._dix = self._map(base + ".dix")
+        self._terms = self._map(base + ".terms")
+        self._post = self._map(base + ".post")
+        self.doc_count = len(self._dix) // SEARCH_DOC.size
+
+    @staticmethod
+    def _map(path: str) -> mmap.mmap:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def term_info(self, term: str) -> Optional[Tuple[int, int, int]]:
+        """Return (postings offset, postings length, df) for a term, None if absent"""
+        key = term.encode("utf-8") + b"\t"
+        start = _bisect_lines(self._terms, key)
+        line = self._terms[start:self._terms.find(b"\n", start)]
+        if not line.startswith(key):
+            return None
+        _term, offset, length, df = line.split(b"\t")
+        return int(offset), int(length), int(df)
+
+    def postings(self, offset: int, length: int) -> Iterator[Tuple[int, int, int]]:
+        """Yield (doc id, frequency, positions offset) in doc id order, skipping positions"""
+        end = offset + length
+        while offset < end:
+            doc_id, frequency = SEARCH_POSTING.unpack_from(self._post, offset)
+            offset += SEARCH_POSTING.size
+            yield doc_id, frequency, offset
+            offset += 4 * frequency
+
+    def positions(self, offset: int, frequency: int) -> Tuple[int, ...]:
+        return struct.unpack_from(f"<{frequency}I", self._post, offset)
+
+    def doc_length(self, doc_id: int) -> int:
+        return SEARCH_DOC.unpack_from(self._dix, doc_id * SEARCH_DOC.size)[2]
+
+    def document(self, doc_id: int) -> Dict[str, str]:
+        offset, length, _tokens = SEARCH_DOC.unpack_from(self._dix, doc_id * SEARCH_DOC.size)
+        return json.loads(self._docs[offset:offset + length])
+
+    def term_entries(self) -> Iterator[Tuple[bytes, int, int]]:
+        """Yield (term, postings offset, postings length) in term order"""
+        # Track the offset explicitly: the mmap's own file position is shared
+        # between readers
+        start = 0
+        while start < len(self._terms):
+            end = self._terms.find(b"\n", start)
+            term, offset, length, _df = self._terms[start:end].split(b"\t")
+            start = end + 1
+            yield term, int(offset), int(length)
+
+
+def _write_terms(base: str, entries: Iterator[Tuple[bytes, List[bytes], int]]):
+    """Write `.terms` and `.post` files from (term, postings chunks, df) in term order"""
+    with open(base + ".terms", "wb") as terms_out, open(base + ".post", "wb") as post_out:
+        offset = 0
+        for term, chunks, df in entries:
+            length = sum(len(chunk) for chunk in chunks)
+            post_out.writelines(chunks)
+            terms_out.write(term + f"\t{offset}\t{length}\t{df}\n".encode("utf-8"))
+            offset += length
+
+
+def _write_segment(directory: str, name: str, documents: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Write an in-memory batch of documents out as a new segment"""
+    base = os.path.join(directory, name)
+    postings: Dict[str, Dict[int, List[int]]] = {}
+    total_tokens = 0
+
+    with open(base + ".docs", "wb") as docs_out, open(base + ".dix", "wb") as dix_out:
+        offset = 0
+        for doc_id, document in enumerate(documents):
+            tokens = _tokenize(document["text"])
+            raw = json.dumps(document).encode("utf-8")
+            docs_out.write(raw)
+            dix_out.write(SEARCH_DOC.pack(offset, len(raw), len(tokens)))
+            offset += len(raw)
+            total_tokens += len(tokens)
+            for position, token in enumerate(tokens):
+                postings.setdefault(token, {}).setdefault(doc_id, []).append(position)
+
+    def entries():
+        for term in sorted(postings, key=lambda t: t.encode("utf-8")):
+            chunks = []
+            for doc_id, positions in postings[term].items():
+                chunks.append(SEARCH_POSTING.pack(doc_id, len(positions)))
+                chunks.append(struct.pack(f"<{len(positions)}I", *positions))
+            yield term.encode("utf-8"), chunks, len(postings[term])
+
+    _write_terms(base, entries())
+    return {"name": name, "docs": len(documents), "tokens": total_tokens}
+
+
+def _merge_segments(directory: str, name: str, segments: List[SearchSegment]) -> Dict[str, Any]:
+    """Merge segments into one, streaming docs and postings with shifted doc ids"""
+    base = os.path.join(directory, name)
+    bases = []
+    total_docs = 0
+    total_tokens = 0
+
+    with open(base + ".docs", "wb") as docs_out, open(base + ".dix", "wb") as dix_out:
+        offset = 0
+        for segment in segments:
+            bases.append(total_docs)
+            for start in range(0, len(segment._docs), 1 << 20):
+                docs_out.write(segment._docs[start:start + (1 << 20)])
+            for doc_id in range(segment.doc_count):
+                doc_offset, length, tokens = SEARCH_DOC.unpack_from(segment._dix, doc_id * SEARCH_DOC.size)
+                dix_out.write(SEARCH_DOC.pack(offset + doc_offset, length, tokens))
+                total_tokens += tokens
+            offset += len(segment._docs)
+            total_docs += segment.doc_count
+
+    def shifted(index: int, offset: int, length: int) -> Tuple[List[bytes], int]:
+        post = segments[index]._post
+        chunks = []
+        end = offset + length
+        while offset < end:
+            doc_id, frequency = SEARCH_POSTING.unpack_from(post, offset)
+            size = SEARCH_POSTING.size + 4 * frequency
+            chunks.append(SEARCH_POSTING.pack(doc_id + bases[index], frequency))
+            chunks.append(post[offset + SEARCH_POSTING.size:offset + size])
+            offset += size
+        return chunks, len(chunks) // 2
+
+    def tagged(index: int) -> Iterator[Tuple[bytes, int, int, int]]:
+        for term, offset, length in segments[index].term_entries():
+            yield term, index, offset, length
+
+    def entries():
+        # Segments are merged in order, so postings stay sorted by doc id
+        streams = [tagged(index) for index in range(len(segments))]
+        current, chunks, df = None, [], 0
+        for term, index, offset, length in heapq.merge(*streams):
+            if term != current and current is not None:
+                yield current, chunks, df
+                chunks, df = [], 0
+            current = term
+            term_chunks, term_df = shifted(index, offset, length)
+            chunks += term_chunks
+            df += term_df
+        if current is not None:
+            yield current, chunks, df
+
+    _write_terms(base, entries())
+    return {"name": name, "docs": total_docs, "tokens": total_tokens}
+
+
+def _remove_segment(directory: str, name: str):
+    for extension in (".docs", ".dix", ".terms", ".post"):
+        path = os.path.join(directory, name + extension)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class SearchIndex:
+    """Incremental on-disk inverted index over ingested pastes or code
+
+    Each ingested batch becomes a new immutable segment that is searchable as
+    soon as it is listed in `segments.json`. Once there are more than
+    SEARCH_MERGE_FACTOR segments, the smallest ones are merged in a background
+    thread. Manifest updates take a file lock, so the bot and importers can share
+    one index directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._manifest_path = os.path.join(directory, "segments.json")
+        self._segments: Dict[str, SearchSegment] = {}
+        self._snapshot: Tuple[List[SearchSegment], int, int] = ([], 0, 0)
+        self._manifest_version = None
+        self._lock = threading.Lock()
+        self._merge_thread: Optional[threading.Thread] = None
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self._manifest_path):
+            return {"next_segment": 0, "segments": []}
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _update_manifest(self, update) -> Any:
+        """Apply `update` to the manifest under an exclusive cross-process lock"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "segments.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self._load_manifest()
+            result = update(manifest)
+            tmp_path = self._manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self._manifest_path)
+            return result
+
+    def _allocate_name(self) -> str:
+        def allocate(manifest):
+            manifest["next_segment"] += 1
+            return f"seg{manifest['next_segment']:08d}"
+        return self._update_manifest(allocate)
+
+    def _live_segments(self) -> Tuple[List[SearchSegment], int, int]:
+        """Return (segments, total docs, total tokens), reopening if the manifest changed"""
+        with self._lock:
+            for _attempt in range(3):
+                version = _file_version(self._manifest_path)
+                if version is None:
+                    return [], 0, 0
+                if version == self._manifest_version:
+                    return self._snapshot
+
+                manifest = self._load_manifest()
+                try:
+                    # Dropped segments are left for the GC to unmap, since an
+                    # in-flight search may still be reading them
+                    segments = {info["name"]: self._segments.get(info["name"])
+                                or SearchSegment(self.directory, info["name"])
+                                for info in manifest["segments"]}
+                except FileNotFoundError:
+                    continue  # Raced with a merge deleting segments; reload
+                self._segments = segments
+                self._snapshot = (list(segments.values()),
+                                  sum(info["docs"] for info in manifest["segments"]),
+                                  sum(info["tokens"] for info in manifest["segments"]))
+                self._manifest_version = version
+            return self._snapshot
+
+    def add_documents(self, documents: Iterable[Dict[str, str]],
+                      flush_every: int = SEARCH_FLUSH_DOCS) -> int:
+        """Ingest documents ({source, title, text}), flushing a segment every `flush_every`"""
+        batch = []
+        count = 0
+        for document in documents:
+            if not TOKEN_PATTERN.search(document["text"]):
+                continue
+            batch.append(document)
+            count += 1
+            if len(batch) >= flush_every:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return count
+
+    def _flush(self, batch: List[Dict[str, str]]):
+        name = self._allocate_name()
+        info = _write_segment(self.directory, name, batch)
+        self._update_manifest(lambda manifest: manifest["segments"].append(info))
+        self.maybe_merge()
+
+    def maybe_merge(self):
+        """Start a background merge if there are too many segments"""
+        if self._merge_thread is not None and self._merge_thread.is_alive():
+            return
+        if len(self._load_manifest()["segments"]) <= SEARCH_MERGE_FACTOR:
+            return
+        self._merge_thread = threading.Thread(target=self._merge, name="search-merge")
+        self._merge_thread.start()
+
+    def wait_for_merges(self):
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+
+    def _merge(self):
+        try:
+            while True:
+                live = self._load_manifest()["segments"]
+                if len(live) <= SEARCH_MERGE_FACTOR:
+                    return
+                victims = sorted(live, key=lambda info: info["docs"])[:SEARCH_MERGE_FACTOR]
+                names = [info["name"] for info in victims]
+
+                name = self._allocate_name()
+                info = _merge_segments(self.directory, name,
+                                       [SearchSegment(self.directory, n) for n in names])
+
+                def swap(manifest):
+                    present = {segment["name"] for segment in manifest["segments"]}
+                    if not all(n in present for n in names):
+                        return False  # Another process merged these first
+                    manifest["segments"] = [s for s in manifest["segments"] if s["name"] not in names]
+                    manifest["segments"].append(info)
+                    return True
+
+                for obsolete in (names if self._update_manifest(swap) else [name]):
+                    _remove_segment(self.directory, obsolete)
+        except Exception:
+            logger.exception("Search index merge failed in %s", self.directory)
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Rank documents matching every keyword and "quoted phrase" with BM25"""
+        phrases = [p for p in (_tokenize(phrase) for phrase in re.findall(r'"([^"]+)"', query)) if p]
+        tokens = set(_tokenize(re.sub(r'"[^"]*"', " ", query)))
+        tokens.update(token for phrase in phrases for token in phrase)
+        if not tokens:
+            return []
+
+        segments, total_docs, total_tokens = self._live_segments()
+        terms = [{token: segment.term_info(token) for token in tokens} for segment in segments]
+        df = {token: sum(t[token][2] for t in terms if t[token]) for token in tokens}
+        idf = {token: math.log(1 + (total_docs - df[token] + 0.5) / (df[token] + 0.5)) for token in tokens}
+        average_length = total_tokens / max(total_docs, 1)
+        k1, b = 1.2, 0.75
+
+        top: List[Tuple[float, int, int, Dict[str, Tuple[int, int]]]] = []
+        for index, (segment, segment_terms) in enumerate(zip(segments, terms)):
+            if not all(segment_terms.values()):
+                continue
+
+            # Walk every term's postings in lockstep, rarest first, and score each
+            # match straight into the heap, so memory stays O(terms + limit)
+            order = sorted(tokens, key=lambda token: segment_terms[token][2])
+            cursors = [segment.postings(*segment_terms[token][:2]) for token in order]
+            for entries in _intersect_postings(cursors):
+                doc_id = entries[0][0]
+                hits = {token: (positions, frequency)
+                        for token, (_doc_id, frequency, positions) in zip(order, entries)}
+                if not all(self._has_phrase(segment, hits, phrase) for phrase in phrases):
+                    continue
+                length_norm = 1 - b + b * segment.doc_length(doc_id) / average_length
+                score = 0.0
+                for token in tokens:
+                    frequency = hits[token][1]
+                    score += idf[token] * frequency * (k1 + 1) / (frequency + k1 * length_norm)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, index, doc_id, hits))
+                else:
+                    heapq.heappushpop(top, (score, index, doc_id, hits))
+
+        results = []
+        for score, index, doc_id, hits in sorted(top, key=lambda hit: hit[:3], reverse=True):
+            segment = segments[index]
+            document = segment.document(doc_id)
+            first = min(segment.positions(positions, 1)[0] for positions, _frequency in hits.values())
+            results.append({
+                "source": document.get("source", ""),
+                "title": document.get("title", ""),
+                "snippet": self._snippet(document["text"], first),
+                "score": score,
+            })
+        return results
+
+    @staticmethod
+    def _has_phrase(segment: SearchSegment, hits: Dict[str, Tuple[int, int]], phrase: List[str]) -> bool:
+        # Positions are only decoded here, for documents that already match every term
+        following = [set(segment.positions(*hits[token])) for token in phrase[1:]]
+        return any(all(start + i + 1 in positions for i, positions in enumerate(following))
+                   for start in segment.positions(*hits[phrase[0]]))
+
+    @staticmethod
+    def _snippet(text: str, token_index: int, before: int = 60, after: int = 140) -> str:
+        for position, match in enumerate(TOKEN_PATTERN.finditer(text)):
+            if position == token_index:
+                start = max(0, match.start() - before)
+                end = min(len(text), match.end() + after)
+                snippet = " ".join(text[start:end].split())
+                return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
+        return " ".join(text[:before + after].split())
+
+
+def iter_documents(paths: List[str]) -> Iterator[Dict[str, str]]:
+    """Yield documents from dump files: JSON lines, plain text files or directory trees"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                yield from iter_documents([os.path.join(root, name) for name in sorted(files)])
+        elif path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        yield {"source": str(record.get("source", path)),
+                               "title": str(record.get("title", "")),
+                               "text": str(record.get("text", ""))}
+        elif os.path.getsize(path) <= SEARCH_MAX_DOCUMENT:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            if "\0" not in text:  # Skip binaries
+                yield {"source": path, "title": os.path.basename(path), "text": text}
+
+
+class _PinnedHostAdapter(requests.adapters.HTTPAdapter):
+    """HTTPS adapter for a URL rewritten to an IP: keeps SNI and certificate checks on the host name"""
+
+    def __init__(self, hostname: str, **kwargs):
+        self.hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["server_hostname"] = self.hostname
+        kwargs["assert_hostname"] = self.hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+class RedirectResolver:
+    """Follows redirect chains hop by hop and caches the result per short URL
+
+    Lookups for a URL that is already being resolved wait on the same request,
+    so a link pasted by many users at once is fetched only once.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, max_hops: int = URL_MAX_HOPS,
+                 cache_size: int = URL_CACHE_SIZE, ttl: int = URL_CACHE_TTL):
+        self.max_hops = max_hops
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._executor = executor
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        url = url.strip().strip("<>()[]'\"")
+        if not re.match(r'^https?://', url, re.IGNORECASE):
+            url = "https://" + url
+        return url
+
+    @staticmethod
+    def public_address(url: str) -> str:
+        """Resolve a hop's host to one checked address
+
+        Raises ValueError if the hop is refused (not http(s), not public) and
+        OSError if the name can't be resolved right now.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme.lower() not in ("http", "https"):
+            raise ValueError(f"unsupported scheme '{parsed.scheme}'")
+        if not parsed.hostname:
+            raise ValueError("no host name")
+        try:
+            port = parsed.port or (443 if parsed.scheme.lower() == "https" else 80)
+            addresses = socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)
+        except (socket.gaierror, UnicodeError) as e:
+            raise OSError(f"cannot resolve {parsed.hostname}") from e
+
+        # Users choose these URLs, so never let them reach loopback, link-local
+        # (cloud metadata) or private hosts through the bot
+        for *_rest, sockaddr in addresses:
+            address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+            if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+                address = address.ipv4_mapped
+            if not address.is_global:
+                raise ValueError(f"{parsed.hostname} is not a public address")
+        return addresses[0][4][0]
+
+    def _request(self, url: str, address: str) -> requests.Response:
+        """HEAD the URL at a checked address, falling back to GET for servers that reject HEAD"""
+        parsed = urllib.parse.urlsplit(url)
+        hostname = parsed.hostname.encode("idna").decode("ascii")
+        port = f":{parsed.port}" if parsed.port else ""
+        pinned = f"[{address}]" if ":" in address else address
+        pinned_url = urllib.parse.urlunsplit(parsed._replace(netloc=pinned + port))
+        host = f"[{hostname}]" if ":" in hostname else hostname
+        headers = {"User-Agent": URL_USER_AGENT, "Host": host + port}
+
+        # Connect to the address that passed the check rather than letting
+        # requests resolve the name again, which a rebinding DNS answer could
+        # point at an internal host. Proxies would re-resolve too, so skip them.
+        with requests.Session() as session:
+            session.trust_env = False
+            session.mount("https://", _PinnedHostAdapter(hostname))
+            try:
+                response = session.head(pinned_url, headers=headers, allow_redirects=False,
+                                        timeout=URL_TIMEOUT)
+                if response.status_code not in (403, 404, 405, 501):
+                    return response
+            except requests.RequestException:
+                pass
+            response = session.get(pinned_url, headers=headers, allow_redirects=False,
+                                   timeout=URL_TIMEOUT, stream=True)
+            response.close()  # Only the status line and headers are needed
+            return response
+
+    def follow(self, url: str) -> Dict[str, Any]:
+        """Resolve one URL's redirect chain (blocking)"""
+        chain = [url]
+        result = {"url": url, "chain": chain, "status": None, "loop": False, "truncated": False,
+                  "refused": None, "error": None}
+
+        for _hop in range(self.max_hops):
+            # A failing hop ends the chain but keeps the hops already followed
+            try:
+                response = self._request(chain[-1], self.public_address(chain[-1]))
+            except (requests.RequestException, OSError) as e:
+                result["error"] = str(e)
+                break
+            except ValueError as e:
+                result["refused"] = str(e)
+                break
+            result["status"] = response.status_code
+            location = response.headers.get("Location")
+            if response.status_code not in (301, 302, 303, 307, 308) or not location:
+                break
+
+            next_url = urllib.parse.urljoin(chain[-1], location)
+            if next_url in chain:
+                result["loop"] = True
+                break
+            chain.append(next_url)
+        else:
+            result["truncated"] = True
+
+        result["final"] = chain[-1]
+        return result
+
+    async def expand(self, url: str) -> Dict[str, Any]:
+        """Resolve a URL, using the cache or an in-flight lookup when possible"""
+        url = self.normalize(url)
+
+        cached = self._cache.get(url)
+        if cached is not None and time.time() - cached[0] < self.ttl:
+            self._cache.move_to_end(url)
+            return cached[1]
+
+        if url in self._pending:
+            return await asyncio.shield(self._pending[url])
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self.follow, url)
+        self._pending[url] = future
+        try:
+            result = await future
+        finally:
+            del self._pending[url]
+
+        # DNS failures and request errors are usually transient, so only
+        # completed chains and policy refusals are cached
+        if result["error"] is None:
+            self._cache[url] = (time.time(), result)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    async def expand_all(self, urls: List[str]) -> List[Any]:
+        """Resolve many URLs concurrently; failures are returned as exceptions"""
+        return await asyncio.gather(*(self.expand(url) for url in urls), return_exceptions=True)
+
+
+def _registrable_domain(host: str) -> Optional[str]:
+    """Approximate the registrable domain of a host name, None if it is a public suffix"""
+    labels = host.rstrip(".").lower().split(".")
+    depth = 3 if ".".join(labels[-2:]) in PUBLIC_SUFFIXES else 2
+    if len(labels) < depth:
+        return None
+    return ".".join(labels[-depth:])
+
+
+def _resolve(name: str, record_type: str) -> List[Any]:
+    """Resolve DNS records, treating a missing name or record type as empty"""
+    try:
+        return list(dns.resolver.resolve(name, record_type, lifetime=PIVOT_DNS_TIMEOUT))
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        return []
+
+
+# Pivot lookups: each takes a target and returns (findings, child nodes)
+def _pivot_whois(domain: str):
+    w = whois.whois(domain)
+    data = {
+        "Registrar": w.registrar,
+        "Created": w.creation_date,
+        "Expires": w.expiration_date,
+        "Emails": w.emails,
+        "Name Servers": w.name_servers,
+    }
+    return {key: value for key, value in data.items() if value}, []
+
+
+def _pivot_a(domain: str):
+    ips = [record.to_text() for record in _resolve(domain, "A")]
+    return ({"A": ips} if ips else {}), [("ip", ip) for ip in ips]
+
+
+def _pivot_ns(domain: str):
+    hosts = [record.to_text().rstrip(".") for record in _resolve(domain, "NS")]
+    domains = [_registrable_domain(host) for host in hosts]
+    return ({"NS": hosts} if hosts else {}), [("whois", domain) for domain in domains if domain]
+
+
+def _pivot_mx(domain: str):
+    hosts = [record.exchange.to_text().rstrip(".") for record in _resolve(domain, "MX")]
+    hosts = [host for host in hosts if host]  # Null MX ("0 .") means no mail
+    return ({"MX": hosts} if hosts else {}), [("a", host) for host in hosts]
+
+
+def _pivot_subdomains(domain: str):
+    return {}, [("a", f"{sub}.{domain}") for sub in COMMON_SUBDOMAINS]
+
+
+def _pivot_ip(ip: str):
+    response = requests.get(f"http://ip-api.com/json/{ip}", timeout=URL_TIMEOUT)
+    data = response.json()
+    if data.get('status') != 'success':
+        raise ValueError(data.get('message', 'lookup failed'))
+    return {
+        "Location": f"{data.get('city', 'Unknown')}, {data.get('country', 'Unknown')}",
+        "ISP": data.get('isp', 'Unknown'),
+        "Organization": data.get('org', 'Unknown'),
+        "AS": data.get('as', 'Unknown'),
+    }, []
+
+
+def _pivot_ptr(ip: str):
+    hosts = [record.to_text().rstrip(".") for record in _resolve(dns.reversename.from_address(ip), "PTR")]
+    domains = [_registrable_domain(host) for host in hosts]
+    return ({"PTR": hosts} if hosts else {}), [("whois", domain) for domain in domains if domain]
+
+
+PIVOT_LOOKUPS = {
+    "whois": ("WHOIS", _pivot_whois),
+    "a": ("A Records", _pivot_a),
+    "ns": ("NS Records", _pivot_ns),
+    "mx": ("MX Records", _pivot_mx),
+    "subdomains": ("Subdomain Probe", _pivot_subdomains),
+    "ip": ("IP Geolocation", _pivot_ip),
+    "ptr": ("Reverse DNS", _pivot_ptr),
+}
+
+
+class PivotPipeline:
+    """Runs dependent OSINT lookups from one domain or IP as a dependency graph
+
+    Each node is a (kind, target) lookup whose findings can schedule child nodes
+    (A records feed IP geolocation, NS records feed WHOIS, ...). Nodes start as
+    soon as their parent finishes and repeated nodes run once, so a full profile
+    takes about as long as its longest dependency path.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, max_nodes: int = PIVOT_MAX_NODES,
+                 max_depth: int = PIVOT_MAX_DEPTH):
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.deduplicated = 0
+        self.skipped = 0
+        self._nodes: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._results: asyncio.Queue = asyncio.Queue()
+        self._executor = executor
+
+    @staticmethod
+    def roots(target: str) -> List[Tuple[str, str]]:
+        try:
+            ipaddress.ip_address(target)
+            return [("ip", target), ("ptr", target)]
+        except ValueError:
+            return [("whois", target), ("a", target), ("ns", target), ("mx", target), ("subdomains", target)]
+
+    def _schedule(self, kind: str, target: str, depth: int) -> bool:
+        key = (kind, target.lower())
+        if key in self._nodes:
+            self.deduplicated += 1
+            return False
+        if depth > self.max_depth or len(self._nodes) >= self.max_nodes:
+            self.skipped += 1
+            return False
+        self._nodes[key] = asyncio.create_task(self._run_node(kind, key[1], depth))
+        return True
+
+    async def _run_node(self, kind: str, target: str, depth: int):
+        label, lookup = PIVOT_LOOKUPS[kind]
+        result = {"kind": kind, "label": label, "target": target, "data": {}, "error": None}
+        started = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result["data"], children = await loop.run_in_executor(self._executor, lookup, target)
+            # Children are scheduled before this node reports, so the
+            # pending count in run() can never drop to zero early
+            result["children"] = sum(self._schedule(child_kind, child_target, depth + 1)
+                                     for child_kind, child_target in children)
+        except Exception as e:
+            result["error"] = str(e)
+        result["elapsed"] = time.monotonic() - started
+        await self._results.put(result)
+
+    async def run(self, target: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield node results in completion order until the graph is exhausted"""
+        try:
+            for kind, root in self.roots(target):
+                self._schedule(kind, root, 1)
+
+            finished = 0
+            while finished < len(self._nodes):
+                yield await self._results.get()
+                finished += 1
+        finally:
+            for task in self._nodes.values():
+                task.cancel()
+
+
+def _utf16_len(text: str) -> int:
+    # Telegram measures message length in UTF-16 code units
+    return len(text.encode("utf-16-le")) // 2
+
+
+class Report:
+    """Structured bot response, rendered as escaped MarkdownV2 or plain text
+
+    Handlers add lines made of styled segments instead of concatenating
+    Markdown, so user input and fetched data (WHOIS fields, EXIF values, paste
+    snippets) are always escaped. Overlong lines are wrapped when added, so every
+    rendered line fits in one message and output can split on line boundaries.
+    """
+
+    def __init__(self, emoji: str, title: str):
+        self.title = title
+        self.lines: List[List[Tuple[Optional[str], str]]] = []
+        self.line(f"{emoji} ", ("bold", title)).blank()
+
+    def line(self, *segments) -> "Report":
+        """Add a line of plain strings or (style, text) segments; style is bold/italic/code"""
+        current: List[Tuple[Optional[str], str]] = []
+        size = 0
+        for segment in segments:
+            style, text = segment if isinstance(segment, tuple) else (None, segment)
+            text = str(text)
+            while text:
+                if size >= REPORT_WRAP:
+                    self.lines.append(current)
+                    current, size = [], 0
+                piece, text = text[:REPORT_WRAP - size], text[REPORT_WRAP - size:]
+                current.append((style, piece))
+                size += len(piece)
+        self.lines.append(current)
+        return self
+
+    def blank(self) -> "Report":
+        return self.line()
+
+    def field(self, emoji: str, label: str, value: Any = "") -> "Report":
+        if isinstance(value, (list, tuple, set)):
+            value = ", ".join(str(v) for v in value)
+        value = str(value)
+        return self.line(f"{emoji} ", ("bold", label), f": {value}" if value else ":")
+
+    def item(self, text: Any, code: bool = False) -> "Report":
+        return self.line("  • ", ("code", str(text)) if code else str(text))
+
+    def note(self, text: str, emoji: str = "\U0001F4A1") -> "Report":
+        return self.line(f"{emoji} ", ("italic", text))
+
+    @staticmethod
+    def _render_segment(style: Optional[str], text: str) -> str:
+        if style == "code":
+            return f"`{escape_markdown(text, version=2, entity_type='code')}`"
+        escaped = escape_markdown(text, version=2)
+        if style == "bold":
+            return f"*{escaped}*"
+        if style == "italic":
+            return f"_{escaped}_"
+        return escaped
+
+    def render_lines(self) -> List[str]:
+        return ["".join(self._render_segment(style, text) for style, text in segments)
+                for segments in self.lines]
+
+    def plain(self) -> str:
+        return "\n".join("".join(text for _style, text in segments) for segments in self.lines) + "\n"
+
+    def filename(self) -> str:
+        slug = re.sub(r'[^a-z0-9]+', '_', self.title.lower()).strip('_')[:60]
+        return f"{slug or 'report'}.txt"
+
+
+def split_message(lines: List[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Pack rendered lines into as few messages as possible, never splitting a line"""
+    chunks = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        length = _utf16_len(line) + 1
+        if current and size + length > limit:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += length
+    if current:
+        chunks.append("\n".join(current))
+    # Telegram rejects empty messages, so drop chunks that are only blank lines
+    return [chunk.strip("\n") for chunk in chunks if chunk.strip()]
+
+
+def render_latest(header: Report, body: Report, limit: int = MESSAGE_LIMIT) -> str:
+    """Render `header` plus as many of `body`'s newest lines (title excluded) as fit in one message"""
+    lines = header.render_lines()
+    size = sum(_utf16_len(line) + 1 for line in lines)
+    latest: List[str] = []
+    for line in reversed(body.render_lines()[2:]):
+        size += _utf16_len(line) + 1
+        if size > limit:
+            break
+        latest.append(line)
+    return "\n".join(lines + latest[::-1]).strip("\n")
+
+
 class OSINTBot:
     def __init__(self, token: str):
         self.token = token
         self.application = Application.builder().token(token).build()
+        self.hash_store = KnownHashStore()
+        self.breach_store = BreachStore()
+        self.paste_index = SearchIndex(os.path.join(SEARCH_INDEX_DIR, "pastes"))
+        self.code_index = SearchIndex(os.path.join(SEARCH_INDEX_DIR, "code"))
+        # Redirect chains can take minutes, so they get their own bounded pool
+        self.url_executor = ThreadPoolExecutor(max_workers=URL_MAX_WORKERS, thread_name_prefix="url")
+        self.url_resolver = RedirectResolver(self.url_executor)
+        # Shared by every /pivot so concurrent pivots can't multiply the thread count
+        self.pivot_executor = ThreadPoolExecutor(max_workers=PIVOT_MAX_WORKERS, thread_name_prefix="pivot")
         self.setup_handlers()
         
     def setup_handlers(self):
@@ -89,6 +1548,7 @@ class OSINTBot:
         self.application.add_handler(CommandHandler("whois_history", self.whois_history))
         self.application.add_handler(CommandHandler("telegram_user_info", self.telegram_user_info))
         self.application.add_handler(CommandHandler("breach_check_domain", self.breach_check_domain))
+        self.application.add_handler(CommandHandler("pivot", self.pivot))
         
         # Callback query handler for inline keyboards
         self.application.add_handler(CallbackQueryHandler(self.button_callback))
@@ -108,6 +1568,25 @@ class OSINTBot:
         await message.edit_text(text)
         return message
 
+    async def send_report(self, update: Update, report: Report):
+        """Send a report as MarkdownV2 message(s), or as one text file if it is too long"""
+        chunks = split_message(report.render_lines())
+        
+        if len(chunks) <= REPORT_MAX_MESSAGES:
+            for chunk in chunks:
+                await update.message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN_V2)
+            return
+        
+        # Too long for chat: attach the full plain-text report instead of truncating it
+        title = report.title if len(report.title) <= 200 else report.title[:200] + "..."
+        caption = escape_markdown(f"{title}\nFull output attached ({len(report.lines)} lines)", version=2)
+        await update.message.reply_document(
+            document=io.BytesIO(report.plain().encode("utf-8")),
+            filename=report.filename(),
+            caption=caption,
+            parse_mode=ParseMode.MARKDOWN_V2
+        )
+
     async def check_channel_membership(self, user_id: int) -> bool:
         """Check if user is a member of the required channel"""
         try:
@@ -371,6 +1850,7 @@ Choose a category below to explore 30+ powerful features:
 • `/hash_lookup <hash>` - Check file hashes
 • `/breach_check <email>` - Comprehensive breach check
 • `/censys_lookup <ip>` - Censys scan data
+• `/pivot <domain|ip>` - Full target profile (WHOIS, DNS, IPs)
 
 \U0001F4A1 *Advanced features for experienced users*
         """
@@ -470,15 +1950,15 @@ Choose a category below to explore 30+ powerful features:
             "Facebook": f"https://facebook.com/{username}"
         }
         
-        result_text = f"\U0001F3AF **Username Search Results for: {username}**\n\n"
+        report = Report("\U0001F3AF", f"Username Search Results for: {username}")
         
         for platform, url in platforms.items():
             # In a real implementation, you would check if the profile exists
-            result_text += f"\U0001F517 **{platform}**: {url}\n"
+            report.field("\U0001F517", platform, url)
         
-        result_text += "\n\U0001F4A1 *Click links to verify profile existence*"
+        report.blank().note("Click links to verify profile existence")
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def email_lookup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Check email in breach databases"""
@@ -495,14 +1975,25 @@ Choose a category below to explore 30+ powerful features:
         
         await update.message.reply_text(f"\U0001F50D Checking breaches for: {email}")
         
-        # Simulate breach check (in real implementation, use HaveIBeenPwned API)
-        result_text = f"\U0001F6E1️ **Breach Check Results for: {email}**\n\n"
-        result_text += "\U0001F50D Checking against known data breaches...\n\n"
-        result_text += "✅ **Status**: No breaches found in public databases\n"
-        result_text += "\U0001F512 **Recommendation**: Continue monitoring regularly\n\n"
-        result_text += "\U0001F4A1 *This is a simulated result. Use HaveIBeenPwned API for real checks*"
+        report = Report("\U0001F6E1️", f"Breach Check Results for: {email}")
+        try:
+            loop = asyncio.get_running_loop()
+            breaches = await loop.run_in_executor(None, self.breach_store.check_email, email)
+            
+            if breaches:
+                report.field("⚠️", "Status", f"Found in {len(breaches)} breach(es)")
+                for breach in breaches:
+                    report.item(breach['name'])
+                report.blank().field("\U0001F512", "Recommendation", "Change passwords reused on these services")
+            else:
+                report.field("✅", "Status", "No breaches found in the local breach index")
+                report.field("\U0001F512", "Recommendation", "Continue monitoring regularly")
+            report.blank().note("Use /breach_check for breach dates and exposed data")
+            
+        except Exception as e:
+            report.field("❌", "Error checking breaches", str(e))
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def phone_lookup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Lookup phone number information"""
@@ -514,14 +2005,14 @@ Choose a category below to explore 30+ powerful features:
         await update.message.reply_text(f"\U0001F4F1 Analyzing phone number: {phone}")
         
         # Simulate phone lookup
-        result_text = f"\U0001F4DE **Phone Number Analysis: {phone}**\n\n"
-        result_text += "\U0001F30D **Country**: Unknown\n"
-        result_text += "\U0001F4E1 **Carrier**: Unknown\n"
-        result_text += "\U0001F4CD **Region**: Unknown\n"
-        result_text += "\U0001F522 **Type**: Unknown\n\n"
-        result_text += "\U0001F4A1 *This is a simulated result. Use numverify API for real lookups*"
-        
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        report = Report("\U0001F4DE", f"Phone Number Analysis: {phone}")
+        report.field("\U0001F30D", "Country", "Unknown")
+        report.field("\U0001F4E1", "Carrier", "Unknown")
+        report.field("\U0001F4CD", "Region", "Unknown")
+        report.field("\U0001F522", "Type", "Unknown")
+        report.blank().note("This is a simulated result. Use numverify API for real lookups")
+        
+        await self.send_report(update, report)
 
     async def ip_lookup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Lookup IP address information"""
@@ -532,27 +2023,27 @@ Choose a category below to explore 30+ powerful features:
         ip = context.args[0]
         await update.message.reply_text(f"\U0001F310 Analyzing IP address: {ip}")
         
+        report = Report("\U0001F30D", f"IP Address Analysis: {ip}")
         try:
             # Use a free IP geolocation service
             response = requests.get(f"http://ip-api.com/json/{ip}")
             data = response.json()
             
             if data['status'] == 'success':
-                result_text = f"\U0001F30D **IP Address Analysis: {ip}**\n\n"
-                result_text += f"\U0001F3D9️ **City**: {data.get('city', 'Unknown')}\n"
-                result_text += f"\U0001F30D **Country**: {data.get('country', 'Unknown')}\n"
-                result_text += f"\U0001F4CD **Region**: {data.get('regionName', 'Unknown')}\n"
-                result_text += f"\U0001F3E2 **ISP**: {data.get('isp', 'Unknown')}\n"
-                result_text += f"\U0001F3DB️ **Organization**: {data.get('org', 'Unknown')}\n"
-                result_text += f"\U0001F550 **Timezone**: {data.get('timezone', 'Unknown')}\n"
-                result_text += f"\U0001F4CD **Coordinates**: {data.get('lat', 'Unknown')}, {data.get('lon', 'Unknown')}\n"
+                report.field("\U0001F3D9️", "City", data.get('city', 'Unknown'))
+                report.field("\U0001F30D", "Country", data.get('country', 'Unknown'))
+                report.field("\U0001F4CD", "Region", data.get('regionName', 'Unknown'))
+                report.field("\U0001F3E2", "ISP", data.get('isp', 'Unknown'))
+                report.field("\U0001F3DB️", "Organization", data.get('org', 'Unknown'))
+                report.field("\U0001F550", "Timezone", data.get('timezone', 'Unknown'))
+                report.field("\U0001F4CD", "Coordinates", f"{data.get('lat', 'Unknown')}, {data.get('lon', 'Unknown')}")
             else:
-                result_text = f"❌ Could not analyze IP address: {ip}"
+                report.line(f"❌ Could not analyze IP address: {ip}")
                 
         except Exception as e:
-            result_text = f"❌ Error analyzing IP address: {str(e)}"
+            report.field("❌", "Error analyzing IP address", str(e))
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def domain_whois(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Get domain WHOIS information"""
@@ -563,20 +2054,20 @@ Choose a category below to explore 30+ powerful features:
         domain = context.args[0]
         await update.message.reply_text(f"\U0001F50D Getting WHOIS info for: {domain}")
         
+        report = Report("\U0001F3E2", f"WHOIS Information for: {domain}")
         try:
             w = whois.whois(domain)
             
-            result_text = f"\U0001F3E2 **WHOIS Information for: {domain}**\n\n"
-            result_text += f"\U0001F4C5 **Creation Date**: {w.creation_date}\n"
-            result_text += f"\U0001F4C5 **Expiration Date**: {w.expiration_date}\n"
-            result_text += f"\U0001F3E2 **Registrar**: {w.registrar}\n"
-            result_text += f"\U0001F4E7 **Registrant Email**: {w.emails}\n"
-            result_text += f"\U0001F310 **Name Servers**: {w.name_servers}\n"
+            report.field("\U0001F4C5", "Creation Date", w.creation_date)
+            report.field("\U0001F4C5", "Expiration Date", w.expiration_date)
+            report.field("\U0001F3E2", "Registrar", w.registrar)
+            report.field("\U0001F4E7", "Registrant Email", w.emails)
+            report.field("\U0001F310", "Name Servers", w.name_servers)
             
         except Exception as e:
-            result_text = f"❌ Error getting WHOIS info: {str(e)}"
+            report.field("❌", "Error getting WHOIS info", str(e))
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def dns_lookup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Perform DNS lookup"""
@@ -587,43 +2078,19 @@ Choose a category below to explore 30+ powerful features:
         domain = context.args[0]
         await update.message.reply_text(f"\U0001F50D DNS lookup for: {domain}")
         
-        result_text = f"\U0001F310 **DNS Records for: {domain}**\n\n"
+        report = Report("\U0001F310", f"DNS Records for: {domain}")
         
-        try:
-            # A Records
+        for emoji, record_type in (("\U0001F4CD", "A"), ("\U0001F4E7", "MX"), ("\U0001F310", "NS")):
             try:
-                a_records = dns.resolver.resolve(domain, 'A')
-                result_text += "\U0001F4CD **A Records**:\n"
-                for record in a_records:
-                    result_text += f"  • {record}\n"
-                result_text += "\n"
-            except:
-                result_text += "\U0001F4CD **A Records**: None found\n\n"
-            
-            # MX Records
-            try:
-                mx_records = dns.resolver.resolve(domain, 'MX')
-                result_text += "\U0001F4E7 **MX Records**:\n"
-                for record in mx_records:
-                    result_text += f"  • {record}\n"
-                result_text += "\n"
-            except:
-                result_text += "\U0001F4E7 **MX Records**: None found\n\n"
-            
-            # NS Records
-            try:
-                ns_records = dns.resolver.resolve(domain, 'NS')
-                result_text += "\U0001F310 **NS Records**:\n"
-                for record in ns_records:
-                    result_text += f"  • {record}\n"
-                result_text += "\n"
-            except:
-                result_text += "\U0001F310 **NS Records**: None found\n\n"
-                
-        except Exception as e:
-            result_text += f"❌ Error performing DNS lookup: {str(e)}"
-        
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+                records = dns.resolver.resolve(domain, record_type)
+                report.field(emoji, f"{record_type} Records")
+                for record in records:
+                    report.item(record)
+            except Exception:
+                report.field(emoji, f"{record_type} Records", "None found")
+            report.blank()
+        
+        await self.send_report(update, report)
 
     async def reverse_image_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Reverse image search instructions"""
@@ -673,32 +2140,28 @@ To perform a reverse image search:
             return
         
         file_path = context.user_data['last_image']
+        report = Report("\U0001F4CA", "EXIF Data Analysis")
         
         try:
             image = Image.open(file_path)
             exifdata = image.getexif()
             
-            if exifdata is not None:
-                result_text = "\U0001F4CA **EXIF Data Analysis**\n\n"
-                
+            if exifdata:
                 for tag_id in exifdata:
                     tag = TAGS.get(tag_id, tag_id)
                     data = exifdata.get(tag_id)
                     
                     if isinstance(data, bytes):
-                        data = data.decode()
+                        data = data.decode(errors="replace")
                     
-                    result_text += f"**{tag}**: {data}\n"
-                
-                if len(result_text) > 4000:
-                    result_text = result_text[:4000] + "...\\n\\n*Truncated due to length*"
+                    report.line(("bold", str(tag)), f": {data}")
             else:
-                result_text = "\U0001F4CA **EXIF Data Analysis**\n\nNo EXIF data found in this image."
+                report.line("No EXIF data found in this image.")
                 
         except Exception as e:
-            result_text = f"❌ Error extracting EXIF data: {str(e)}"
+            report.field("❌", "Error extracting EXIF data", str(e))
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def website_archive(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Get archived versions of a website"""
@@ -711,12 +2174,12 @@ To perform a reverse image search:
         # Create Wayback Machine link
         wayback_url = f"https://web.archive.org/web/*/{url}"
         
-        result_text = f"\U0001F3DB️ **Website Archive Search**\n\n"
-        result_text += f"\U0001F517 **Original URL**: {url}\n"
-        result_text += f"\U0001F4DA **Wayback Machine**: {wayback_url}\n\n"
-        result_text += "\U0001F4A1 *Click the Wayback Machine link to view archived versions*"
+        report = Report("\U0001F3DB️", "Website Archive Search")
+        report.field("\U0001F517", "Original URL", url)
+        report.field("\U0001F4DA", "Wayback Machine", wayback_url)
+        report.blank().note("Click the Wayback Machine link to view archived versions")
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def subdomain_finder(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Find subdomains for a domain"""
@@ -728,23 +2191,22 @@ To perform a reverse image search:
         await update.message.reply_text(f"\U0001F50D Searching subdomains for: {domain}")
         
         # Simulate subdomain discovery
-        common_subdomains = ['www', 'mail', 'ftp', 'admin', 'blog', 'shop', 'api', 'dev', 'test', 'staging']
         found_subdomains = []
         
-        for sub in common_subdomains:
+        for sub in COMMON_SUBDOMAINS:
             subdomain = f"{sub}.{domain}"
             # In real implementation, you would actually test these
             found_subdomains.append(subdomain)
         
-        result_text = f"\U0001F310 **Subdomain Discovery for: {domain}**\n\n"
-        result_text += "\U0001F50D **Common Subdomains Found**:\n"
+        report = Report("\U0001F310", f"Subdomain Discovery for: {domain}")
+        report.field("\U0001F50D", "Common Subdomains Found")
         
         for subdomain in found_subdomains[:10]:  # Limit to first 10
-            result_text += f"  • {subdomain}\n"
+            report.item(subdomain)
         
-        result_text += "\n\U0001F4A1 *This is a simulated result. Use tools like sublist3r for real discovery*"
+        report.blank().note("This is a simulated result. Use tools like sublist3r for real discovery")
         
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        await self.send_report(update, report)
 
     async def port_scan(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Passive port scanning information"""
@@ -754,17 +2216,17 @@ To perform a reverse image search:
         
         ip = context.args[0]
         
-        result_text = f"\U0001F513 **Port Scan Information for: {ip}**\n\n"
-        result_text += "⚠️ **Note**: This bot performs passive scanning only.\n\n"
-        result_text += "\U0001F50D **Recommended Tools**:\n"
-        result_text += "  • Shodan.io - Internet-wide scan data\n"
-        result_text += "  • Censys.io - Device discovery\n"
-        result_text += "  • Nmap - Local network scanning\n\n"
-        result_text += f"\U0001F310 **Shodan Search**: https://shodan.io/host/{ip}\n"
-        result_text += f"\U0001F50D **Censys Search**: https://search.censys.io/hosts/{ip}\n\n"
-        result_text += "\U0001F4A1 *Use /shodan_lookup or /censys_lookup for API-based results*"
-        
-        await update.message.reply_text(result_text, parse_mode=ParseMode.MARKDOWN)
+        report = Report("\U0001F513", f"Port Scan Information for: {ip}")
+        report.field("⚠️", "Note", "This bot performs passive scanning only.").blank()
+        report.field("\U0001F50D", "Recommended Tools")
+        report.item("Shodan.io - Internet-wide scan data")
+        report.item("Censys.io - Device discovery")
+        report.item("Nmap - Local network scanning").blank()
+        report.field("\U0001F310", "Shodan Search", f"https://shodan.io/host/{ip}")
+        report.field("\U0001F50D", "Censys Search", f"https://search.censys.io/hosts/{ip}")
+        report.blank().note("Use /shodan_lookup or /censys_lookup for API-based results")
+        
+        await self.send_report(update, report)
 
     async def pastebin_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Search Pastebin for keywords"""
@@ -773,5 +2235,306 @@ To perform a reverse image search:
             return
         
         keyword = ' '.join(context.args)
+        await update.message.reply_text(f"\U0001F50D Searching pastes for: {keyword}")
+        
+        report = Report("\U0001F4CB", f"Paste Search Results for: {keyword}")
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(None, self.paste_index.search, keyword)
+            self.add_search_results(report, results)
+        except Exception as e:
+            report.field("❌", "Error searching pastes", str(e)).blank()
+        
+        search_query = urllib.parse.quote_plus(keyword)
+        report.field("\U0001F310", "Search Online")
+        report.item(f"Google: https://www.google.com/search?q=site%3Apastebin.com+{search_query}")
+        report.item(f"PSBDMP: https://psbdmp.ws/?q={search_query}")
+        
+        await self.send_report(update, report)
+
+    async def github_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Search ingested code dumps and GitHub for keywords"""
+        if not context.args:
+            await update.message.reply_text("Usage: /github_search <keyword>")
+            return
+        
+        keyword = ' '.join(context.args)
+        await update.message.reply_text(f"\U0001F50D Searching code for: {keyword}")
+        
+        report = Report("\U0001F4BB", f"Code Search Results for: {keyword}")
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(None, self.code_index.search, keyword)
+            self.add_search_results(report, results)
+        except Exception as e:
+            report.field("❌", "Error searching code", str(e)).blank()
+        
+        search_query = urllib.parse.quote_plus(keyword)
+        report.field("\U0001F310", "Search Online")
+        report.item(f"GitHub Code: https://github.com/search?q={search_query}&type=code")
+        report.item(f"GitHub Repos: https://github.com/search?q={search_query}&type=repositories")
+        
+        await self.send_report(update, report)
+
+    def add_search_results(self, report: Report, results: List[Dict[str, Any]]):
+        """Add local search hits with their snippets to a report"""
+        if not results:
+            report.line("\U0001F50D No matches in the local index").blank()
+            return
+        
+        for result in results:
+            report.line("\U0001F4C4 ", ("bold", result['title'] or 'Untitled'))
+            report.line(f"  \U0001F517 {result['source']}")
+            report.line("  ", ("code", result['snippet'])).blank()
+
+    async def hash_lookup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Check a file hash against the local known-hash corpus"""
+        if not context.args:
+            await update.message.reply_text("Usage: /hash_lookup <md5|sha1|sha256>")
+            return
+        
+        file_hash = context.args[0].lower()
+        algorithm = KnownHashStore.detect_algorithm(file_hash)
+        
+        if algorithm is None:
+            await update.message.reply_text("❌ Invalid hash format (expected MD5, SHA-1 or SHA-256)")
+            return
+        
+        await update.message.reply_text(f"\U0001F510 Looking up {algorithm.upper()} hash: {file_hash}")
+        
+        report = Report("\U0001F510", "Hash Lookup Results")
+        try:
+            # A cold lookup is a few dozen random reads of a large mmap, so keep it off the event loop
+            loop = asyncio.get_running_loop()
+            label = await loop.run_in_executor(None, self.hash_store.lookup, file_hash)
+            
+            report.line("\U0001F522 ", ("bold", "Hash"), ": ", ("code", file_hash))
+            report.field("\U0001F9EE", "Algorithm", algorithm.upper())
+            
+            if label is not None:
+                report.field("⚠️", "Status", "Found in known-hash corpus")
+                report.field("\U0001F3F7️", "Source", label).blank()
+            else:
+                report.field("✅", "Status", "Not found in local corpus").blank()
+            
+            report.field("\U0001F517", "VirusTotal", f"https://www.virustotal.com/gui/file/{file_hash}")
+            
+        except Exception as e:
+            report.field("❌", "Error looking up hash", str(e))
+        
+        await self.send_report(update, report)
+
+    async def breach_check(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Comprehensive breach check for an email address"""
+        if not context.args:
+            await update.message.reply_text("Usage: /breach_check <email>")
+            return
+        
+        email = context.args[0]
+        
+        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+            await update.message.reply_text("❌ Invalid email format")
+            return
+        
+        await update.message.reply_text(f"\U0001F4A5 Running breach check for: {email}")
+        
+        report = Report("\U0001F4A5", f"Breach Report for: {email}")
+        try:
+            loop = asyncio.get_running_loop()
+            breaches = await loop.run_in_executor(None, self.breach_store.check_email, email)
+            
+            if not breaches:
+                report.field("✅", "Status", "No breaches found in the local breach index")
+            else:
+                report.field("⚠️", "Breaches Found", len(breaches)).blank()
+                for breach in breaches:
+                    report.line("\U0001F4C1 ", ("bold", breach['name']))
+                    report.line(f"  \U0001F4C5 Date: {breach.get('date') or 'Unknown'}")
+                    if breach.get('data_classes'):
+                        report.line(f"  \U0001F4CB Exposed: {', '.join(breach['data_classes'])}")
+                    report.blank()
+            
+        except Exception as e:
+            report.field("❌", "Error checking breaches", str(e))
+        
+        await self.send_report(update, report)
+
+    async def breach_check_domain(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Enumerate breached accounts for a whole domain"""
+        if not context.args:
+            await update.message.reply_text("Usage: /breach_check_domain <domain>")
+            return
+        
+        domain = context.args[0].lower()
+        await update.message.reply_text(f"\U0001F50D Enumerating breached accounts for: {domain}")
         
-        result
+        report = Report("\U0001F4A5", f"Domain Breach Report for: {domain}")
+        try:
+            # A large domain is millions of index lines, so keep the scan off the event loop
+            loop = asyncio.get_running_loop()
+            accounts, per_breach, shown = await loop.run_in_executor(
+                None, self.breach_store.domain_summary, domain)
+            
+            if not accounts:
+                report.field("✅", "Status", "No breached accounts in the local breach index")
+            else:
+                report.field("⚠️", "Breached Accounts", accounts).blank()
+                report.field("\U0001F4C1", "By Breach")
+                for breach_id, count in sorted(per_breach.items(), key=lambda item: -item[1]):
+                    report.item(f"{self.breach_store.breach(breach_id)['name']}: {count}")
+                report.blank().field("\U0001F4E7", "Accounts")
+                for email in shown:
+                    report.item(email)
+                if accounts > len(shown):
+                    report.line(f"  ... and {accounts - len(shown)} more")
+            
+        except Exception as e:
+            report.field("❌", "Error checking domain breaches", str(e))
+        
+        await self.send_report(update, report)
+
+    async def url_expander(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Expand shortened URLs by following their redirect chains"""
+        if not context.args:
+            await update.message.reply_text("Usage: /url_expander <url> [url ...]")
+            return
+        
+        urls = list(dict.fromkeys(context.args))[:URL_MAX_PER_MESSAGE]
+        await update.message.reply_text(f"\U0001F517 Expanding {len(urls)} URL(s)...")
+        
+        results = await self.url_resolver.expand_all(urls)
+        
+        report = Report("\U0001F517", "URL Expansion Results")
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                report.field("❌", url, str(result)).blank()
+                continue
+            
+            report.field("\U0001F517", "Short URL", result['url'])
+            report.field("\U0001F3AF", "Final URL", result['final'])
+            status = f" (HTTP {result['status']})" if result['status'] is not None else ""
+            report.field("↪️", "Hops", f"{len(result['chain']) - 1}{status}")
+            for hop in result['chain'][1:-1]:
+                report.item(hop)
+            if result['loop']:
+                report.field("⚠️", "Warning", "Redirect loop detected")
+            if result['truncated']:
+                report.field("⚠️", "Warning", f"Stopped after {URL_MAX_HOPS} hops")
+            if result['refused']:
+                report.field("\U0001F6AB", "Refused", f"{result['final']}: {result['refused']}")
+            if result['error']:
+                report.field("❌", "Error", f"{result['final']}: {result['error']}")
+            report.blank()
+        
+        await self.send_report(update, report)
+
+    async def pivot(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Profile a domain or IP by running dependent lookups concurrently"""
+        if not context.args:
+            await update.message.reply_text("Usage: /pivot <domain|ip>")
+            return
+        
+        target = context.args[0].strip().lower()
+        status = await update.message.reply_text(f"\U0001F9ED Pivoting from: {target}...")
+        
+        # Findings stream into one status message, edited at most every
+        # PIVOT_PROGRESS_INTERVAL, so a 60-node pivot doesn't trip Telegram's
+        # per-chat flood limits; the full report follows once the graph is done
+        pipeline = PivotPipeline(self.pivot_executor)
+        report = Report("\U0001F9ED", f"Pivot Results for: {target}")
+        failures: List[str] = []
+        started = time.monotonic()
+        last_update = started - PIVOT_PROGRESS_INTERVAL
+        completed = empty = failed = 0
+        
+        async for node in pipeline.run(target):
+            completed += 1
+            if node["error"]:
+                failed += 1
+                failures.append(f"{node['label']} for {node['target']}: {node['error']}")
+            elif not node["data"]:
+                empty += 1
+            else:
+                report.line("\U0001F539 ", ("bold", f"{node['label']}: {node['target']}"))
+                for key, value in node["data"].items():
+                    report.field("  •", key, value)
+                report.blank()
+            
+            if time.monotonic() - last_update >= PIVOT_PROGRESS_INTERVAL:
+                last_update = time.monotonic()
+                header = Report("\U0001F9ED", f"Pivoting from: {target}")
+                header.note(f"{completed} lookups done ({failed} failed), latest findings:", "⏳").blank()
+                try:
+                    await status.edit_text(render_latest(header, report), parse_mode=ParseMode.MARKDOWN_V2)
+                except Exception as e:
+                    logger.warning("Pivot progress update failed: %s", e)
+        
+        try:
+            await status.edit_text(f"\U0001F9ED Pivot complete for: {target}, full results below")
+        except Exception as e:
+            logger.warning("Pivot progress update failed: %s", e)
+        
+        if failures:
+            report.field("❌", "Failed Lookups")
+            for failure in failures:
+                report.item(failure)
+            report.blank()
+        report.field("✅", "Lookups", f"{completed} ({empty} empty, {failed} failed)")
+        report.field("♻️", "Deduplicated", pipeline.deduplicated)
+        if pipeline.skipped:
+            report.field("⏭️", "Skipped (depth/size limit)", pipeline.skipped)
+        report.field("⏱️", "Time", f"{time.monotonic() - started:.1f}s")
+        
+        await self.send_report(update, report)
+
+
+def main():
+    """Run the bot, or one of the offline data import commands"""
+    parser = argparse.ArgumentParser(description="OSINT BY DIWAS Telegram bot")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    hashes_parser = subparsers.add_parser("import-hashes", help="Build the known-hash index from text dumps")
+    hashes_parser.add_argument("dumps", nargs="+", help="Text files containing MD5/SHA-1/SHA-256 hashes")
+    hashes_parser.add_argument("--label", help="Source label for these hashes (default: file name)")
+    hashes_parser.add_argument("--index-dir", default=HASH_INDEX_DIR, help="Index directory")
+    
+    breach_parser = subparsers.add_parser("import-breach", help="Add a breach dump to the breach index")
+    breach_parser.add_argument("dumps", nargs="+", help="Breach dump files (one record per line)")
+    breach_parser.add_argument("--name", required=True, help="Breach name, e.g. 'ExampleCorp 2021'")
+    breach_parser.add_argument("--date", help="Breach date (YYYY-MM-DD)")
+    breach_parser.add_argument("--data-classes", default="", help="Comma-separated exposed data, e.g. 'Emails,Passwords'")
+    breach_parser.add_argument("--index-dir", default=BREACH_INDEX_DIR, help="Index directory")
+    
+    documents_parser = subparsers.add_parser("import-documents", help="Ingest paste or code dumps into the search index")
+    documents_parser.add_argument("paths", nargs="+", help="Text files, .jsonl dumps ({source, title, text}) or directories")
+    documents_parser.add_argument("--index", choices=["pastes", "code"], required=True, help="Index to ingest into")
+    documents_parser.add_argument("--index-dir", default=SEARCH_INDEX_DIR, help="Search index root directory")
+    
+    args = parser.parse_args()
+    
+    if args.command == "import-hashes":
+        counts = import_hash_dumps(args.dumps, args.index_dir, label=args.label)
+        for algorithm, count in counts.items():
+            print(f"{algorithm}: {count} hashes indexed")
+        return
+    
+    if args.command == "import-breach":
+        data_classes = [c.strip() for c in args.data_classes.split(",") if c.strip()]
+        counts = import_breach_dumps(args.dumps, args.name, args.index_dir,
+                                     date=args.date, data_classes=data_classes)
+        print(f"{counts['emails']} email records, {counts['domain_entries']} domain entries indexed")
+        return
+    
+    if args.command == "import-documents":
+        index = SearchIndex(os.path.join(args.index_dir, args.index))
+        count = index.add_documents(iter_documents(args.paths))
+        index.wait_for_merges()
+        print(f"{count} documents ingested into the {args.index} index")
+        return
+    
+    bot = OSINTBot(BOT_TOKEN)
+    bot.application.run_polling()
+
+
+if __name__ == "__main__":
+    main()